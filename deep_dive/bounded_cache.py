@@ -0,0 +1,253 @@
+"""
+BOUNDED DISPATCH CACHE
+----------------------
+`functools.singledispatch` caches "type -> handler" for every class it has ever seen.
+That is perfect for a fixed set of types, but some services create classes at runtime
+(e.g. one `Event` dataclass per schema version). In a long-running worker those classes
+keep piling up in the dispatch cache.
+
+This file builds a dispatcher with a size-bounded LRU cache:
+- Hot types stay cached, so they keep the O(1) fast path.
+- Cold types are evicted (oldest first), so memory stays flat.
+- `cache_info()` reports hits / misses / evictions, just like `functools.lru_cache`.
+- `warm()` / `snapshot()` / `warm_from_snapshot()` pre-resolve hot types (see cache_warmup.py).
+
+Resolution itself is delegated to `functools._find_impl`, the same MRO/ABC-aware
+algorithm that `singledispatch` uses (see how_dispatch_works.md).
+"""
+
+import gc
+import importlib
+import inspect
+from abc import get_cache_token
+from collections import OrderedDict, namedtuple
+from dataclasses import dataclass, make_dataclass
+from functools import _compose_mro, _find_impl, update_wrapper
+from typing import get_type_hints
+
+DispatchCacheInfo = namedtuple(
+    "DispatchCacheInfo", ["hits", "misses", "maxsize", "currsize", "evictions"]
+)
+
+
+class BoundedDispatcher:
+    """
+    A `singledispatch`-style generic function whose cache holds at most `maxsize` types.
+    `maxsize=None` means unbounded. Unlike `functools.singledispatch`, the cache holds
+    classes strongly, so an unbounded cache keeps every dispatched class alive.
+    """
+
+    def __init__(self, func, maxsize=128):
+        if maxsize is not None and maxsize < 0:
+            raise ValueError("maxsize must be None or >= 0")
+        self.registry = {object: func}
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+        self._cache_token = None
+        self._hits = self._misses = self._evictions = 0
+        update_wrapper(self, func)
+
+    def register(self, cls, func=None):
+        """
+        Register `func` for `cls`. Works as `@f.register(cls)`, `f.register(cls, func)`,
+        or bare `@f.register` with the class taken from the first parameter's annotation.
+        """
+        if func is None and inspect.isfunction(cls):
+            func = cls
+            cls = next(iter(get_type_hints(func).values()), None)
+            if not isinstance(cls, type):
+                raise TypeError(f"Invalid annotation for {func.__name__!r}: {cls!r} is not a class")
+        if not isinstance(cls, type):
+            raise TypeError(f"Invalid first argument to `register()`: {cls!r} is not a class")
+        if func is None:
+            return lambda f: self.register(cls, f)
+        self.registry[cls] = func
+        # Registering an ABC means `issubclass` answers can change later (ABC.register),
+        # so remember the ABC cache token and clear the cache whenever it moves.
+        if self._cache_token is None and hasattr(cls, "__abstractmethods__"):
+            self._cache_token = get_cache_token()
+        self._refresh()
+        return func
+
+    def dispatch(self, cls):
+        """Return the handler for `cls`, using (and maintaining) the LRU cache."""
+        if self._cache_token is not None:
+            current_token = get_cache_token()
+            if self._cache_token != current_token:
+                # Any `ABC.register()` in the process moves the token. Re-resolving every
+                # cached type here would bill one unlucky caller for all of them, so just
+                # clear: each type pays for its own miss on its next call.
+                self._cache_token = current_token
+                self._cache.clear()
+
+        try:
+            impl = self._cache[cls]
+        except KeyError:
+            pass
+        else:
+            self._hits += 1
+            self._cache.move_to_end(cls)
+            return impl
+
+        self._misses += 1
+        impl = _find_impl(cls, self.registry)
+        if self.maxsize != 0:
+            self._cache[cls] = impl
+            if self.maxsize is not None and len(self._cache) > self.maxsize:
+                # Evict the least recently used type. Dropping our reference lets a
+                # dynamic class be garbage collected (its ABC cache entries are weak).
+                self._cache.popitem(last=False)
+                self._evictions += 1
+        return impl
+
+    def _refresh(self):
+        # Re-resolve the cached (hot) types instead of dropping them, so a late
+        # `register` doesn't send every hot type back to a cold miss. Only `register`
+        # calls this, so the caller who changed the registry pays for it.
+        for cls in list(self._cache):
+            try:
+                self._cache[cls] = _find_impl(cls, self.registry)
+            except RuntimeError:
+                # The type became ambiguous (e.g. it now matches two unrelated ABCs).
+                # Drop it, so the error surfaces on its own next call, like functools.
+                del self._cache[cls]
+
+    def warm(self, types):
+        """Pre-resolve `types` so their first real call is a cache hit."""
+        for cls in types:
+            if cls not in self._cache:
+                self.dispatch(cls)
+
+    def snapshot(self):
+        """
+        Export the cached types as {"module:QualName": "module:RegisteredQualName"}.
+        Order is least -> most recently used, so replaying it keeps the LRU order.
+        Types that can't be imported by name (e.g. defined inside a function) are skipped.
+        """
+        mapping = {}
+        for cls in self._cache:
+            registered = self._matched_type(cls)
+            if "<locals>" in cls.__qualname__ or "<locals>" in registered.__qualname__:
+                continue
+            mapping[_qualified_name(cls)] = _qualified_name(registered)
+        return mapping
+
+    def warm_from_snapshot(self, mapping):
+        """
+        Replay a `snapshot()` (e.g. at startup or in a forked worker).
+        Returns the entries that could not be replayed: the type no longer imports,
+        or it now resolves to a different registered type than when it was recorded.
+        """
+        stale = {}
+        for cls_name, registered_name in mapping.items():
+            try:
+                cls = _resolve_name(cls_name)
+            except (ImportError, AttributeError):
+                stale[cls_name] = registered_name
+                continue
+            self.dispatch(cls)
+            if self._matched_type(cls) is not _resolve_name_or_none(registered_name):
+                stale[cls_name] = registered_name
+        return stale
+
+    def _matched_type(self, cls):
+        """The registered type `cls` resolves to (same MRO walk as `_find_impl`)."""
+        mro = _compose_mro(cls, self.registry.keys())
+        return next(base for base in mro if base in self.registry)
+
+    def cache_info(self):
+        return DispatchCacheInfo(
+            self._hits, self._misses, self.maxsize, len(self._cache), self._evictions
+        )
+
+    def cache_clear(self):
+        self._cache.clear()
+        self._hits = self._misses = self._evictions = 0
+
+    def __call__(self, *args, **kwargs):
+        if not args:
+            raise TypeError(f"{self.__name__} requires at least 1 positional argument")
+        return self.dispatch(args[0].__class__)(*args, **kwargs)
+
+
+def _qualified_name(cls):
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+def _resolve_name(name):
+    module_name, _, qualname = name.partition(":")
+    obj = importlib.import_module(module_name)
+    for attr in qualname.split("."):
+        obj = getattr(obj, attr)
+    return obj
+
+
+def _resolve_name_or_none(name):
+    try:
+        return _resolve_name(name)
+    except (ImportError, AttributeError):
+        return None
+
+
+def bounded_singledispatch(func=None, *, maxsize=128):
+    """Decorator: `@bounded_singledispatch` or `@bounded_singledispatch(maxsize=256)`."""
+    if func is None:
+        return lambda f: BoundedDispatcher(f, maxsize)
+    return BoundedDispatcher(func, maxsize)
+
+
+# --- Demo: one Event class per schema version ---
+
+@dataclass
+class Event:
+    pass
+
+
+@dataclass
+class PlayerMove(Event):
+    x: int
+    y: int
+
+
+@bounded_singledispatch(maxsize=64)
+def handle_event(event):
+    return "unhandled"
+
+
+@handle_event.register(Event)
+def _(event):
+    return "generic event"
+
+
+@handle_event.register(PlayerMove)
+def _(event):
+    return "move"
+
+
+def make_schema_event(version):
+    """Simulates a class generated at runtime from schema version `version`."""
+    return make_dataclass(f"SchemaEventV{version}", [("payload", dict)], bases=(Event,))
+
+
+def main():
+    print("--- Bounded LRU Dispatch Cache ---\n")
+
+    hot = PlayerMove(1, 2)
+    for version in range(5_000):
+        event = make_schema_event(version)(payload={})
+        assert handle_event(event) == "generic event"
+        assert handle_event(hot) == "move"  # The hot type stays cached.
+        if version in (1_000, 4_999):
+            gc.collect()  # Dynamic classes are reference cycles.
+            alive = len(Event.__subclasses__())
+            print(f"After {version + 1:>5} dynamic classes: {alive} Event subclasses still alive")
+
+    info = handle_event.cache_info()
+    print(f"\n{info}")
+    print(f"Hit rate: {info.hits / (info.hits + info.misses):.1%}")
+    print("\nThe cache never grows past maxsize, and the hot `PlayerMove` type")
+    print("is never evicted because it is used on every iteration.")
+
+
+if __name__ == "__main__":
+    main()
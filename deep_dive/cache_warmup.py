@@ -0,0 +1,116 @@
+"""
+DISPATCH CACHE WARM-UP
+----------------------
+The first call for each type is a cache miss: the dispatcher walks the MRO
+(and, for ABCs like `Sequence`/`Mapping`, asks every ABC `issubclass`).
+Right after a deploy - or after a plugin registers a new handler - that cost
+shows up as tail latency on the first requests.
+
+The fix is to pay it up front:
+1. After a representative run, `snapshot()` the resolved types by qualified name.
+2. At startup (or in each forked worker), `warm_from_snapshot()` replays it.
+3. Or, if you already know your hot types, just call `warm(types)`.
+
+Uses `BoundedDispatcher` from bounded_cache.py. Run from this folder:
+    python cache_warmup.py
+"""
+
+import json
+import os
+import tempfile
+import time
+from collections import OrderedDict, UserDict, UserList, defaultdict, deque
+from collections.abc import Mapping, Sequence, Set
+
+from bounded_cache import bounded_singledispatch
+
+
+def make_encoder():
+    """Builds a fresh dispatcher, i.e. what a new process starts with."""
+
+    @bounded_singledispatch(maxsize=256)
+    def encode(obj):
+        return repr(obj)
+
+    @encode.register(Mapping)
+    def _(obj):
+        return {str(k): encode(v) for k, v in obj.items()}
+
+    @encode.register(Sequence)
+    def _(obj):
+        return [encode(v) for v in obj]
+
+    @encode.register(Set)
+    def _(obj):
+        return sorted(encode(v) for v in obj)
+
+    @encode.register(str)
+    def _(obj):
+        return obj
+
+    return encode
+
+
+class Tags(frozenset):
+    pass
+
+
+class Path(tuple):
+    pass
+
+
+HOT_VALUES = [
+    {"a": 1}, OrderedDict(a=1), defaultdict(int), UserDict(a=1),
+    [1], (1,), deque([1]), UserList([1]), range(3), Path((1, 2)),
+    {1}, frozenset({1}), Tags({1}), "text", 3.5, b"raw",
+]
+
+
+def first_call_latency_us(encode):
+    """Time the first call for each hot type (the p99-relevant one)."""
+    timings = []
+    for value in HOT_VALUES:
+        start = time.perf_counter_ns()
+        encode.dispatch(type(value))
+        timings.append((time.perf_counter_ns() - start) / 1000)
+    return max(timings), sum(timings) / len(timings)
+
+
+def main():
+    print("--- Dispatch Cache Warm-up ---\n")
+
+    # 1. Cold start: every first call pays full MRO/ABC resolution.
+    encode = make_encoder()
+    worst, mean = first_call_latency_us(encode)
+    print(f"Cold first calls:   worst {worst:7.1f} us | mean {mean:6.1f} us")
+
+    # 2. Steady state: what every later call costs.
+    worst, mean = first_call_latency_us(encode)
+    print(f"Steady state:       worst {worst:7.1f} us | mean {mean:6.1f} us")
+
+    # 3. Record the resolved mapping after the "representative run" above.
+    snapshot_path = os.path.join(tempfile.gettempdir(), "encode_dispatch_snapshot.json")
+    with open(snapshot_path, "w") as f:
+        json.dump(encode.snapshot(), f, indent=2)
+    print(f"\nSnapshot written to {snapshot_path}:")
+    with open(snapshot_path) as f:
+        for cls_name, registered_name in json.load(f).items():
+            print(f"  {cls_name:<35} -> {registered_name}")
+
+    # 4. "New process": a fresh dispatcher replays the snapshot before serving traffic.
+    encode = make_encoder()
+    with open(snapshot_path) as f:
+        stale = encode.warm_from_snapshot(json.load(f))
+    worst, mean = first_call_latency_us(encode)
+    print(f"\nWarmed first calls: worst {worst:7.1f} us | mean {mean:6.1f} us")
+    print(f"Stale snapshot entries: {stale or 'none'}")
+
+    # 5. A late plugin registration re-resolves the hot types instead of dropping them.
+    encode.register(Tags, lambda obj: "tags")
+    worst, mean = first_call_latency_us(encode)
+    print(f"After register():   worst {worst:7.1f} us | mean {mean:6.1f} us")
+    print(f"\n{encode.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+THREAD-SAFE DISPATCH (FREE-THREADED PYTHON)
+-------------------------------------------
+On free-threaded CPython (3.13t, no GIL), many threads calling one `singledispatch`
+function all hit its shared cache, and `register()` mutates that cache and the
+registry while other threads are reading them.
+
+This dispatcher keeps the read path lock-free with a copy-on-write table:
+- The registry is an immutable snapshot. `register()` builds a NEW table and swaps
+  it in with a single attribute assignment (atomic), under a lock only writers take.
+- Each table version owns its cache. Readers fill it without locking: two threads
+  racing on a miss compute the same handler, and a single dict store is atomic.
+  A reader still holding an old table only ever writes to that old (discarded) cache.
+- Caches are plain dicts keyed on the class: no weak references, because creating a
+  `ref(cls)` on every lookup contends on the hot class object without the GIL.
+  Dynamic classes are freed instead by bounding the cache: once it holds `maxsize`
+  classes it is cleared (one atomic operation), and every `register()` starts a fresh one.
+- When an ABC gains a virtual subclass, the (rare) cache reset takes the writer lock
+  too, so it can never overwrite a table that `register()` just published.
+
+Run the benchmark on a GIL build and a free-threaded build
+(`python3.13t thread_safe_dispatch.py`) and compare. With the GIL, throughput can't
+grow with thread count. The free-threaded numbers haven't been measured yet.
+"""
+
+import inspect
+import sys
+import threading
+import time
+from abc import get_cache_token
+from collections.abc import Mapping, Sequence
+from functools import _find_impl, singledispatch, update_wrapper
+from types import MappingProxyType
+from typing import NamedTuple, get_type_hints
+
+
+class _DispatchTable(NamedTuple):
+    registry: MappingProxyType
+    cache: dict
+    cache_token: object
+
+
+class ThreadSafeDispatcher:
+    """
+    A `singledispatch`-style generic function whose `dispatch()` takes no lock
+    (except for the rare cache reset after an `ABC.register()`).
+    """
+
+    def __init__(self, func, maxsize=1024):
+        if maxsize < 1:
+            raise ValueError("maxsize must be >= 1")
+        self.maxsize = maxsize
+        self._table = _DispatchTable(MappingProxyType({object: func}), {}, None)
+        self._write_lock = threading.Lock()
+        update_wrapper(self, func)
+
+    @property
+    def registry(self):
+        return self._table.registry
+
+    def register(self, cls, func=None):
+        """
+        Register `func` for `cls`. Works as `@f.register(cls)`, `f.register(cls, func)`,
+        or bare `@f.register` with the class taken from the first parameter's annotation.
+        """
+        if func is None and inspect.isfunction(cls):
+            func = cls
+            cls = next(iter(get_type_hints(func).values()), None)
+            if not isinstance(cls, type):
+                raise TypeError(f"Invalid annotation for {func.__name__!r}: {cls!r} is not a class")
+        if not isinstance(cls, type):
+            raise TypeError(f"Invalid first argument to `register()`: {cls!r} is not a class")
+        if func is None:
+            return lambda f: self.register(cls, f)
+        with self._write_lock:
+            table = self._table
+            registry = dict(table.registry)
+            registry[cls] = func
+            cache_token = table.cache_token
+            if cache_token is None and hasattr(cls, "__abstractmethods__"):
+                cache_token = get_cache_token()
+            # One assignment publishes the new registry and a fresh cache together.
+            self._table = _DispatchTable(MappingProxyType(registry), {}, cache_token)
+        return func
+
+    def dispatch(self, cls):
+        table = self._table
+        if table.cache_token is not None:
+            current_token = get_cache_token()
+            if table.cache_token != current_token:
+                table = self._reset_cache()
+        impl = table.cache.get(cls)
+        if impl is None:
+            impl = _find_impl(cls, table.registry)
+            if len(table.cache) >= self.maxsize:
+                # Full: drop everything (an atomic `clear`, no LRU bookkeeping on the
+                # read path). This is what lets dynamically created classes be freed.
+                table.cache.clear()
+            table.cache[cls] = impl
+        return impl
+
+    def _reset_cache(self):
+        # An ABC gained a virtual subclass. Re-read the table under the writer lock:
+        # publishing from the table this reader started with could undo a `register()`.
+        with self._write_lock:
+            table = self._table
+            current_token = get_cache_token()
+            if table.cache_token is not None and table.cache_token != current_token:
+                table = table._replace(cache={}, cache_token=current_token)
+                self._table = table
+            return table
+
+    def __call__(self, *args, **kwargs):
+        if not args:
+            raise TypeError(f"{self.__name__} requires at least 1 positional argument")
+        return self.dispatch(args[0].__class__)(*args, **kwargs)
+
+
+def thread_safe_singledispatch(func=None, *, maxsize=1024):
+    """Decorator: `@thread_safe_singledispatch` or `@thread_safe_singledispatch(maxsize=256)`."""
+    if func is None:
+        return lambda f: ThreadSafeDispatcher(f, maxsize)
+    return ThreadSafeDispatcher(func, maxsize)
+
+
+# --- Benchmark ---
+
+class Point:
+    pass
+
+VALUES = [1, "text", 2.5, [1], (1,), {"a": 1}, Point(), b"raw"]
+
+
+def build(decorator):
+    @decorator
+    def describe(x):
+        return "object"
+
+    describe.register(int, lambda x: "int")
+    describe.register(str, lambda x: "str")
+    describe.register(Sequence, lambda x: "sequence")
+    describe.register(Mapping, lambda x: "mapping")
+    return describe
+
+
+def throughput(describe, n_threads, calls_per_thread=200_000):
+    """Total calls per second with `n_threads` threads hammering `describe`."""
+    start_barrier = threading.Barrier(n_threads + 1)
+
+    def worker():
+        values = VALUES * (calls_per_thread // len(VALUES))
+        start_barrier.wait()
+        for value in values:
+            describe(value)
+
+    threads = [threading.Thread(target=worker) for _ in range(n_threads)]
+    for t in threads:
+        t.start()
+    start_barrier.wait()
+    start = time.perf_counter()
+    for t in threads:
+        t.join()
+    return n_threads * calls_per_thread / (time.perf_counter() - start)
+
+
+def check_concurrent_register(describe):
+    """
+    Readers must always see a complete table while another thread registers,
+    and no registration may be lost, even while ABC cache resets race with it.
+    """
+    stop = threading.Event()
+    errors = []
+
+    def reader():
+        while not stop.is_set():
+            if describe(3) != "int" or describe(Point()) not in ("object", "point"):
+                errors.append("inconsistent dispatch")
+
+    def abc_registrar():
+        # Every `Sequence.register` moves the ABC cache token, forcing cache resets.
+        i = 0
+        while not stop.is_set():
+            Sequence.register(type(f"Virtual{i}", (), {}))
+            i += 1
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    threads.append(threading.Thread(target=abc_registrar))
+    for t in threads:
+        t.start()
+    dynamic = [type(f"Dynamic{i}", (), {}) for i in range(200)]
+    for cls in dynamic:
+        describe.register(cls, lambda x: "dynamic")
+    describe.register(Point, lambda x: "point")
+    stop.set()
+    for t in threads:
+        t.join()
+    assert not errors, errors
+    assert all(cls in describe.registry for cls in dynamic), "lost a registration"
+    assert all(describe(cls()) == "dynamic" for cls in dynamic)
+    assert describe(Point()) == "point"
+
+
+def main():
+    gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"--- Thread-Safe Dispatch (Python {sys.version.split()[0]}, GIL {'on' if gil_enabled else 'off'}) ---\n")
+
+    check_concurrent_register(build(thread_safe_singledispatch))
+    print("Concurrent register() while reading: OK\n")
+
+    print(f"{'threads':>7} | {'singledispatch':>16} | {'thread-safe COW':>16}")
+    for n_threads in (1, 2, 4, 8):
+        results = [
+            throughput(build(decorator), n_threads)
+            for decorator in (singledispatch, thread_safe_singledispatch)
+        ]
+        print(f"{n_threads:>7} | " + " | ".join(f"{r / 1e6:12.2f} M/s" for r in results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+REAL WORLD PATTERN: Compact Events & Columnar Batches
+-----------------------------------------------------
+The `Event` dataclasses in event_handler.py are regular classes: every
+`PlayerMove(x, y)` carries its own `__dict__`. With millions of queued events,
+that per-object overhead dominates the heap.
+
+Two fixes, both still routed with `singledispatch`:
+1. Slotted, frozen dataclasses: no `__dict__`, so each event is ~1.5x smaller.
+2. Columnar batches: many events of one type stored as struct-of-arrays
+   (`array.array`, one column per field). This is where the several-fold saving is.
+   The router dispatches the WHOLE batch to a handler that processes the columns
+   in one go (vectorised with NumPy if installed). Batches without a dedicated
+   handler are split back into events and routed one by one.
+
+Only fixed-size numeric fields can be columns. Events with strings
+(`PlayerAttack.target`, `GameQuit.reason`) stay as individual slotted events.
+
+Requirement: Python 3.10+ (for `@dataclass(slots=True)`)
+"""
+
+import tracemalloc
+from array import array
+from dataclasses import dataclass
+from functools import singledispatch
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: handlers fall back to plain Python.
+    np = None
+
+# --- 1. The Events (slotted + frozen) ---
+
+@dataclass(frozen=True, slots=True)
+class Event:
+    pass
+
+@dataclass(frozen=True, slots=True)
+class PlayerMove(Event):
+    x: int
+    y: int
+
+@dataclass(frozen=True, slots=True)
+class PlayerAttack(Event):
+    damage: int
+    target: str
+
+@dataclass(frozen=True, slots=True)
+class GameQuit(Event):
+    reason: str
+
+# --- 2. Columnar Batches ---
+
+class ColumnarBatch:
+    """
+    Many events of `event_type`, stored as one `array.array` per field.
+    Subclasses set `event_type` and `typecodes` ({field name: array typecode}).
+    """
+    event_type = None
+    typecodes = {}
+
+    def __init__(self):
+        self.columns = {name: array(code) for name, code in self.typecodes.items()}
+
+    @classmethod
+    def from_events(cls, events):
+        batch = cls()
+        for event in events:
+            batch.append(event)
+        return batch
+
+    def append(self, event):
+        """
+        Appends all fields of `event`, or none of them: if one value doesn't fit its
+        column, the columns already appended are rolled back so the batch stays aligned.
+        """
+        appended = []
+        try:
+            for name, column in self.columns.items():
+                value = getattr(event, name)
+                column.append(value)
+                appended.append(column)
+        except BaseException as exc:
+            for column in appended:
+                column.pop()
+            if isinstance(exc, OverflowError):
+                raise OverflowError(
+                    f"{type(event).__name__}.{name}={value!r} is out of range "
+                    f"for column type {column.typecode!r}"
+                ) from exc
+            raise
+
+    def column(self, name):
+        """The column as a NumPy array (zero-copy) if NumPy is installed, else the raw array."""
+        column = self.columns[name]
+        return np.frombuffer(column, dtype=column.typecode) if np is not None else column
+
+    def __len__(self):
+        return len(next(iter(self.columns.values())))
+
+    def __iter__(self):
+        """Materialise individual events again (e.g. for handlers that don't accept batches)."""
+        for values in zip(*self.columns.values()):
+            yield self.event_type(*values)
+
+class PlayerMoveBatch(ColumnarBatch):
+    event_type = PlayerMove
+    typecodes = {"x": "i", "y": "i"}
+
+# Which event types have a columnar form.
+BATCH_TYPES = {PlayerMoveBatch.event_type: PlayerMoveBatch}
+
+
+def batch_events(events):
+    """
+    Groups consecutive runs of batchable events into columnar batches.
+    Order is preserved: other events are yielded as-is between the batches.
+    """
+    batch = None
+    for event in events:
+        batch_type = BATCH_TYPES.get(type(event))
+        if batch is not None and type(batch) is not batch_type:
+            yield batch
+            batch = None
+        if batch_type is None:
+            yield event
+            continue
+        if batch is None:
+            batch = batch_type()
+        batch.append(event)
+    if batch is not None:
+        yield batch
+
+# --- 3. The Event Router ---
+
+@singledispatch
+def handle_event(event):
+    print(f"[Unhandled] Ignoring unknown event: {event}")
+
+@handle_event.register(PlayerMove)
+def _(e):
+    print(f"MOVE: Player moved to ({e.x}, {e.y})")
+
+@handle_event.register(ColumnarBatch)
+def _(batch):
+    # No handler for this batch type: route its events one by one.
+    for event in batch:
+        handle_event(event)
+
+def bounds(column):
+    """(min, max) of a column. NumPy reduces in C; builtins on NumPy scalars would not."""
+    if np is not None:
+        return column.min(), column.max()
+    return min(column), max(column)
+
+@handle_event.register(PlayerMoveBatch)
+def _(batch):
+    xs, ys = batch.column("x"), batch.column("y")
+    (x_lo, x_hi), (y_lo, y_hi) = bounds(xs), bounds(ys)
+    print(f"MOVE x{len(batch)}: final position ({xs[-1]}, {ys[-1]}), "
+          f"bounding box x={x_lo}..{x_hi} y={y_lo}..{y_hi}")
+
+@handle_event.register(PlayerAttack)
+def _(e):
+    print(f"ATTACK: Dealt {e.damage} damage to {e.target}!")
+
+@handle_event.register(GameQuit)
+def _(e):
+    print(f"QUIT: Game over. Reason: {e.reason}")
+
+# --- 4. Memory Comparison ---
+
+@dataclass
+class DictPlayerMove:
+    """The original, `__dict__`-based PlayerMove from event_handler.py."""
+    x: int
+    y: int
+
+
+def traced_bytes(build):
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def main():
+    N = 1_000_000
+    print(f"--- Memory for {N:,} PlayerMove events ---")
+    for label, build in [
+        ("Regular dataclass", lambda: [DictPlayerMove(i, i) for i in range(N)]),
+        ("Slotted dataclass", lambda: [PlayerMove(i, i) for i in range(N)]),
+        ("Columnar batch", lambda: PlayerMoveBatch.from_events(PlayerMove(i, i) for i in range(N))),
+    ]:
+        print(f"{label:<19} {traced_bytes(build) / N:6.1f} bytes/event")
+    print(f"(NumPy vectorised handlers: {'on' if np is not None else 'off'})")
+
+    event_queue = [
+        PlayerMove(x=10, y=20),
+        PlayerMove(x=11, y=21),
+        PlayerMove(x=12, y=19),
+        PlayerAttack(damage=50, target="Orc"),
+        PlayerMove(x=13, y=20),
+        "RandomGarbage",  # Simulating a bad event
+        GameQuit(reason="Rage Quit"),
+    ]
+
+    print("\n--- Processing Event Queue (batched) ---")
+    for item in batch_events(event_queue):
+        handle_event(item)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+REAL WORLD PATTERN: Memoized Dispatch Handlers
+----------------------------------------------
+In json_serializer.py, `serialize` often receives the SAME immutable values over and over
+(the same `datetime`, the same frozen `User` record). Each time, the handler recomputes
+`isoformat()` or rebuilds the dict.
+
+For pure handlers, opt in to a per-handler result cache at registration time:
+
+    @serialize.register(datetime, memoize=True, maxsize=1024)
+
+- Keys carry the exact type of the value AND of everything nested in it (tuples,
+  frozensets, dataclass fields), plus the sign of floats. So `1`/`True`, `0.0`/`-0.0`
+  and `User(1, ...)`/`User(True, ...)` (all equal!) never collide.
+- Each cache is LRU-bounded, with hits / misses via `serialize.cache_info()`.
+  A hit costs building the key, one hash and one dict lookup instead of a handler call.
+- Unhashable values (e.g. a subclass with `__hash__ = None`) and calls with extra
+  arguments simply bypass the cache.
+
+Pitfalls:
+- Only memoize pure handlers of immutable, hashable values.
+- Building the key for a dataclass walks its fields in Python, so for a handler as
+  cheap as the `User` one below, memoizing is actually slower. It pays off for
+  costlier handlers like `datetime`. Measure first.
+- Values that compare equal must serialize identically. Aware datetimes break this:
+  12:00+00:00 == 13:00+01:00, but their ISO strings differ. Pass `key=` to add what
+  equality ignores (here, the UTC offset).
+- Cached results are shared. Don't mutate what `serialize` returns.
+"""
+
+import inspect
+import json
+import timeit
+from collections import OrderedDict, namedtuple
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from functools import singledispatch, wraps
+from math import copysign
+
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+# Builtins whose equal values are indistinguishable once their type is known.
+_SCALARS = frozenset({int, bool, str, bytes, type(None)})
+
+
+def _typed_key(value):
+    """
+    A cache key that only matches values a handler can't tell apart: equal values of
+    different types (1 / True), even when nested, and floats of different sign (0.0 / -0.0).
+    """
+    cls = value.__class__
+    if cls in _SCALARS:
+        return cls, value
+    if cls is float:
+        return cls, value, copysign(1.0, value)
+    if cls is tuple:
+        return cls, tuple(map(_typed_key, value))
+    if cls is frozenset:
+        return cls, frozenset(map(_typed_key, value))
+    dataclass_fields = getattr(cls, "__dataclass_fields__", None)
+    if dataclass_fields is not None:
+        return cls, tuple(_typed_key(getattr(value, name)) for name in dataclass_fields)
+    return cls, value
+
+
+def _is_plain(cls):
+    """True if `(cls, value)` is already a precise key, i.e. `_typed_key` has nothing to add."""
+    return cls not in (float, tuple, frozenset) and not hasattr(cls, "__dataclass_fields__")
+
+
+def _memoize(handler, maxsize, key):
+    """Wraps `handler` in an LRU result cache keyed on `_typed_key(value)` (and `key(value)`)."""
+    cache = OrderedDict()
+    plain_classes = {}  # class -> _is_plain(class), so the common case skips _typed_key.
+    hits = misses = 0
+
+    @wraps(handler)
+    def memoized(value, *args, **kwargs):
+        nonlocal hits, misses
+        if args or kwargs:
+            return handler(value, *args, **kwargs)
+        cls = value.__class__
+        plain = plain_classes.get(cls)
+        if plain is None:
+            plain = plain_classes[cls] = _is_plain(cls)
+        cache_key = (cls, value) if plain else _typed_key(value)
+        if key is not None:
+            cache_key = (cache_key, key(value))
+        try:
+            result = cache[cache_key]
+        except KeyError:
+            pass
+        except TypeError:  # Unhashable value: nothing to cache.
+            return handler(value)
+        else:
+            hits += 1
+            cache.move_to_end(cache_key)
+            return result
+
+        misses += 1
+        result = cache[cache_key] = handler(value)
+        if len(cache) > maxsize:
+            cache.popitem(last=False)
+        return result
+
+    def cache_info():
+        return CacheInfo(hits, misses, maxsize, len(cache))
+
+    def cache_clear():
+        nonlocal hits, misses
+        cache.clear()
+        hits = misses = 0
+
+    memoized.cache_info = cache_info
+    memoized.cache_clear = cache_clear
+    return memoized
+
+
+def memoizing_singledispatch(func):
+    """
+    `functools.singledispatch` whose `register` also accepts
+    `memoize=True, maxsize=128, key=None` for pure handlers.
+    If given, `key(value)` is added to the cache key next to the value itself.
+    """
+    dispatcher = singledispatch(func)
+    plain_register = dispatcher.register
+    memoized = {}
+
+    def register(cls, func=None, *, memoize=False, maxsize=128, key=None):
+        if func is None and inspect.isfunction(cls):
+            # `@register` used bare, with the class taken from annotations.
+            return plain_register(cls)
+        if func is None:
+            return lambda f: register(cls, f, memoize=memoize, maxsize=maxsize, key=key)
+        if memoize:
+            func = memoized[cls] = _memoize(func, maxsize, key)
+        plain_register(cls, func)
+        return func
+
+    def cache_info():
+        """{registered type: CacheInfo} for every memoized handler."""
+        return {cls: handler.cache_info() for cls, handler in memoized.items()}
+
+    def cache_clear():
+        for handler in memoized.values():
+            handler.cache_clear()
+
+    dispatcher.register = register
+    dispatcher.cache_info = cache_info
+    dispatcher.cache_clear = cache_clear
+    return dispatcher
+
+
+# --- 1. Our Data Models (frozen, so they are hashable) ---
+@dataclass(frozen=True)
+class User:
+    id: int
+    name: str
+
+# --- 2. The Serializer Logic ---
+
+@memoizing_singledispatch
+def serialize(obj):
+    """Fallback: If we don't know how to serialize it, convert to string."""
+    return str(obj)
+
+@serialize.register(datetime, memoize=True, maxsize=1024, key=lambda d: d.utcoffset())
+def _(obj):
+    """Serialize datetime to ISO format."""
+    return obj.isoformat()
+
+@serialize.register(set)
+def _(obj):
+    """Sets are mutable (unhashable), so this handler is NOT memoized."""
+    return sorted(list(obj))
+
+@serialize.register(User, memoize=True, maxsize=4096)
+def _(obj):
+    """Serialize our custom User object to a dict."""
+    return {"__type__": "User", "id": obj.id, "name": obj.name}
+
+# The same serializer without memoization, for comparison.
+@singledispatch
+def serialize_plain(obj):
+    return str(obj)
+
+serialize_plain.register(datetime, lambda obj: obj.isoformat())
+serialize_plain.register(set, lambda obj: sorted(list(obj)))
+serialize_plain.register(User, lambda obj: {"__type__": "User", "id": obj.id, "name": obj.name})
+
+# --- 3. Demo ---
+
+def main():
+    noon = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+    same_instant = noon.astimezone(timezone(timedelta(hours=1)))
+    users = [User(id=i, name=f"user{i}") for i in range(50)]
+
+    records = [
+        {"timestamp": noon, "user_info": users[i % len(users)], "tags": {"a", "b"}}
+        for i in range(20_000)
+    ]
+
+    print("Serializing complex data...")
+    print(json.dumps(records[0], default=serialize, indent=2))
+
+    # Equal instants, different offsets: `key=` keeps them apart.
+    print(f"\n{serialize(noon)} vs {serialize(same_instant)}")
+
+    N = 200_000
+    print(f"\n{N:,} calls on a repeated value:")
+    for value in (noon, users[0]):
+        t_plain = timeit.timeit(lambda: serialize_plain(value), number=N)
+        t_memo = timeit.timeit(lambda: serialize(value), number=N)
+        print(f"  {type(value).__name__:<9} plain {t_plain:.3f}s | memoized {t_memo:.3f}s")
+    serialize.cache_clear()
+
+    json.dumps(records, default=serialize)
+    print("\nCache stats:")
+    for cls, info in serialize.cache_info().items():
+        print(f"  {cls.__name__:<9} {info}")
+
+
+if __name__ == "__main__":
+    main()